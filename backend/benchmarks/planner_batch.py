@@ -0,0 +1,84 @@
+"""
+Compare N sequential /api/planner/generate calls with one
+/api/planner/generate/batch call against a running backend.
+
+Usage:
+    python benchmarks/planner_batch.py --url http://127.0.0.1:8000 --n 20 --distinct 5
+
+Both runs are paid from the same per-client LLM token budget: sequential
+calls get 429s once it runs out, and batch items wait up to
+PLANNER_BATCH_BUDGET_WAIT for refill. Raise RATE_LIMIT_LLM_TOKENS_BURST and
+RATE_LIMIT_LLM_TOKENS_PER_MINUTE on the server to compare raw throughput.
+"""
+import argparse
+import json
+import time
+import urllib.request
+
+SUBJECT_POOL = ["Math", "Physics", "Chemistry", "Biology", "History", "English", "Economics", "Art"]
+
+
+def post_json(url: str, payload: dict):
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(payload).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST"
+    )
+    return urllib.request.urlopen(request, timeout=300)
+
+
+def build_requests(n: int, distinct: int) -> list:
+    requests = []
+    for i in range(n):
+        k = i % distinct
+        requests.append({"subjects": [SUBJECT_POOL[k % len(SUBJECT_POOL)], SUBJECT_POOL[(k + 1) % len(SUBJECT_POOL)]]})
+    return requests
+
+
+def run_sequential(base_url: str, requests: list) -> float:
+    start = time.perf_counter()
+    for item in requests:
+        with post_json(f"{base_url}/api/planner/generate", item) as response:
+            response.read()
+    return time.perf_counter() - start
+
+
+def run_batch(base_url: str, requests: list):
+    start = time.perf_counter()
+    first_result = None
+    lines = 0
+    with post_json(f"{base_url}/api/planner/generate/batch", {"requests": requests}) as response:
+        for raw in response:
+            if not raw.strip():
+                continue
+            lines += 1
+            if first_result is None:
+                first_result = time.perf_counter() - start
+    return time.perf_counter() - start, first_result, lines
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--n", type=int, default=20)
+    parser.add_argument("--distinct", type=int, default=5)
+    parser.add_argument("--skip-sequential", action="store_true")
+    args = parser.parse_args()
+
+    requests = build_requests(args.n, max(1, args.distinct))
+    print(f"📊 {args.n} requests, {args.distinct} distinct subject sets")
+
+    if not args.skip_sequential:
+        sequential = run_sequential(args.url, requests)
+        print(f"🐢 Sequential: {sequential:.2f}s total, {sequential / args.n:.2f}s per plan")
+
+    total, first, lines = run_batch(args.url, requests)
+    print(f"🚀 Batch: {total:.2f}s total, first result after {first or 0:.2f}s, {lines} lines")
+
+    if not args.skip_sequential and total > 0:
+        print(f"⚡ Speedup: {sequential / total:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
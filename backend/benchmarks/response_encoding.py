@@ -0,0 +1,166 @@
+"""
+Measure per-route response time and bytes on the wire for the large JSON
+routes, going through the real routers and response models with a
+TestClient. Compares FastAPI's default JSONResponse without compression
+against CompactJSONResponse + CompressionMiddleware.
+
+Firestore and auth are replaced with in-memory fakes so this runs offline;
+transcripts and user data are seeded-random text, not repeated strings.
+Requires httpx (for TestClient).
+
+Usage:
+    python benchmarks/response_encoding.py --notes 200 --buddies 2000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from firebase_admin import firestore
+
+from services.compression import CompressionMiddleware, brotli
+from services.serialization import CompactJSONResponse, orjson
+
+VOCABULARY = (
+    "entropy energy system heat engine temperature pressure volume work cycle efficiency "
+    "reversible process equilibrium state molecule gas ideal law first second third kinetic "
+    "potential force mass acceleration velocity momentum collision conservation field charge "
+    "current voltage resistance circuit capacitor induction magnetic wave frequency amplitude "
+    "interference diffraction photon electron nucleus isotope decay half life reaction rate "
+    "catalyst enzyme protein cell membrane mitosis meiosis gene allele dominant recessive "
+    "evolution selection species population ecosystem revolution empire treaty parliament "
+    "economy inflation demand supply market equation derivative integral limit matrix vector "
+    "probability distribution variance theorem proof lemma example problem exam homework "
+    "remember note important because therefore however instead example professor lecture week"
+).split()
+FIRST_NAMES = ["Aarav", "Maya", "Liam", "Zara", "Noah", "Ira", "Eli", "Sana", "Kai", "Nora", "Ravi", "Lena"]
+SUBJECTS = ["Math", "Physics", "Chemistry", "Biology", "History", "English", "Economics"]
+
+
+def random_text(rng: random.Random, words: int) -> str:
+    sentences = []
+    while words > 0:
+        length = min(words, rng.randint(8, 20))
+        sentence = " ".join(rng.choice(VOCABULARY) for _ in range(length))
+        sentences.append(sentence.capitalize() + rng.choice([".", ".", "?", f" {rng.randint(1, 999)}."]))
+        words -= length
+    return " ".join(sentences)
+
+
+class FakeUserDoc:
+    def __init__(self, rng: random.Random, index: int):
+        self.id = "".join(rng.choice("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789") for _ in range(28))
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(FIRST_NAMES)}son"
+        self._data = {
+            "name": name,
+            "email": f"{name.split()[0].lower()}{index}@example.edu",
+            "online": rng.random() < 0.3,
+            "studyPreferences": {
+                "subject": rng.choice(SUBJECTS),
+                "level": rng.choice(["Beginner", "Intermediate", "Advanced"]),
+                "availability": rng.choice(["Weekdays", "Weekends", "Evenings"]),
+                "studyStyle": rng.choice(["Collaborative", "Quiet", "Discussion"])
+            }
+        }
+
+    def to_dict(self):
+        return self._data
+
+
+class FakeUsers:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def collection(self, name):
+        return self
+
+    def stream(self):
+        return iter(self.docs)
+
+
+def load_routes(rng: random.Random, notes: int, buddies: int):
+    firestore.client = lambda: FakeUsers([FakeUserDoc(rng, i) for i in range(buddies)])
+
+    import routes.study_buddy as study_buddy
+    import routes.voice_notes as voice_notes
+
+    voice_notes.voice_notes_storage[:] = [
+        voice_notes.VoiceNote(
+            id=f"note_{1792300000000 + i * 7919}",
+            title=f"Voice Note - Oct {1 + i % 28}, 2026 {1 + i % 12:02d}:{i % 60:02d} PM",
+            transcript=random_text(rng, rng.randint(300, 900)),
+            summary=random_text(rng, 40),
+            key_points=[random_text(rng, rng.randint(6, 14)) for _ in range(rng.randint(5, 7))],
+            created_at=f"2026-10-{1 + i % 28:02d}T{i % 24:02d}:{i % 60:02d}:00",
+            preprocessing={
+                "applied": True,
+                "original_bytes": rng.randint(200_000, 900_000),
+                "processed_bytes": rng.randint(50_000, 200_000),
+                "bytes_saved": rng.randint(100_000, 700_000),
+                "original_seconds": round(rng.uniform(60, 300), 2),
+                "processed_seconds": round(rng.uniform(40, 250), 2),
+                "transcription_seconds": round(rng.uniform(0.5, 4), 3),
+                "transcription_seconds_saved_estimate": round(rng.uniform(0, 1), 3)
+            }
+        )
+        for i in range(notes)
+    ]
+    return study_buddy, voice_notes
+
+
+def build_app(study_buddy, voice_notes, compact: bool) -> TestClient:
+    if compact:
+        app = FastAPI(default_response_class=CompactJSONResponse)
+        app.add_middleware(CompressionMiddleware)
+    else:
+        app = FastAPI()
+    app.include_router(study_buddy.router)
+    app.include_router(voice_notes.router)
+    app.dependency_overrides[study_buddy.verify_token] = lambda: {"uid": "benchmark", "email": "bench@example.edu"}
+    return TestClient(app)
+
+
+def measure(client: TestClient, path: str, encoding: str, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get(path, headers={"Accept-Encoding": encoding})
+        timings.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200, response.text
+    wire_bytes = int(response.headers["content-length"])
+    return statistics.median(timings), wire_bytes, response.headers.get("content-encoding", "identity")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--notes", type=int, default=200)
+    parser.add_argument("--buddies", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    study_buddy, voice_notes = load_routes(random.Random(args.seed), args.notes, args.buddies)
+    clients = {
+        "JSONResponse, no compression": (build_app(study_buddy, voice_notes, compact=False), ["identity"]),
+        f"CompactJSONResponse ({'orjson' if orjson else 'stdlib fallback'})": (
+            build_app(study_buddy, voice_notes, compact=True),
+            ["identity", "gzip"] + (["br"] if brotli is not None else [])
+        )
+    }
+
+    for path in ["/api/voice/notes", "/api/study-buddy/available"]:
+        print(f"\n📍 GET {path}")
+        for label, (client, encodings) in clients.items():
+            for encoding in encodings:
+                median_ms, wire_bytes, served = measure(client, path, encoding, args.repeat)
+                print(f"   {label:<38} {served:<8} {median_ms:8.2f} ms  {wire_bytes:>10,} bytes")
+
+
+if __name__ == "__main__":
+    main()
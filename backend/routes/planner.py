@@ -1,42 +1,176 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import json
 import os
 from groq import Groq
+from services.rate_limit import estimate_prompt_tokens, get_client_id, llm_gate, llm_limiter
+from services.single_flight import llm_calls, request_key
 
 router = APIRouter(prefix="/api/planner", tags=["Planner"])
 
 client = Groq(api_key=os.getenv("GROQ_API_KEY"))
 
+MAX_BATCH_SIZE = int(os.getenv("PLANNER_MAX_BATCH_SIZE", "200"))
+BATCH_CONCURRENCY = int(os.getenv("PLANNER_BATCH_CONCURRENCY", "4"))
+# Batch items queue for a gate slot instead of being shed after they were charged
+BATCH_SLOT_TIMEOUT = float(os.getenv("PLANNER_BATCH_SLOT_TIMEOUT", "30"))
+# How long one batch item may wait for the client's token bucket to refill
+BATCH_BUDGET_WAIT = float(os.getenv("PLANNER_BATCH_BUDGET_WAIT", "60"))
+
 class StudyRequest(BaseModel):
     subjects: List[str]
 
-@router.post("/generate")
-def generate_plan(data: StudyRequest):
-
-    if not os.getenv("GROQ_API_KEY"):
-        raise HTTPException(status_code=500, detail="GROQ_API_KEY not found")
+class BatchStudyRequest(BaseModel):
+    requests: List[StudyRequest] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
 
+def _build_params(subjects: List[str]) -> dict:
     prompt = f"""
 Create a simple 7-day study plan.
-Subjects: {', '.join(data.subjects)}
+Subjects: {', '.join(subjects)}
 
 Give day-wise plan in bullet points.
 """
 
-    try:
-        completion = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",  # Updated to supported model
-            messages=[
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.6,
-            max_tokens=400
-        )
+    return {
+        "model": "llama-3.3-70b-versatile",  # Updated to supported model
+        "messages": [
+            {"role": "user", "content": prompt}
+        ],
+        "temperature": 0.6,
+        "max_tokens": 400
+    }
+
+def _estimate_cost(params: dict) -> int:
+    return estimate_prompt_tokens(params["messages"][0]["content"], max_tokens=params["max_tokens"])
+
+def _create_completion(params: dict, slot_timeout: Optional[float] = None):
+    # Only the call that actually goes upstream takes a gate slot
+    with llm_gate.slot(timeout=slot_timeout):
+        return client.chat.completions.create(**params)
+
+def _generate(params: dict, slot_timeout: Optional[float] = None) -> str:
+    # Identical in-flight prompts share one upstream call
+    completion = llm_calls.do(request_key(params), lambda: _create_completion(params, slot_timeout))
+    return completion.choices[0].message.content
+
+@router.post("/generate")
+def generate_plan(data: StudyRequest, client_id: str = Depends(get_client_id)):
+
+    if not os.getenv("GROQ_API_KEY"):
+        raise HTTPException(status_code=500, detail="GROQ_API_KEY not found")
+
+    params = _build_params(data.subjects)
+
+    # Charge prompt + completion budget up front so over-budget callers get a fast 429
+    cost = _estimate_cost(params)
+    llm_limiter.check(client_id, cost)
 
+    try:
         return {
-            "plan": completion.choices[0].message.content
+            "plan": _generate(params)
         }
 
+    except HTTPException as e:
+        if e.status_code == 503:
+            # Shed by the gate before reaching Groq, so don't keep the charge
+            llm_limiter.refund(client_id, cost)
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/generate/batch")
+def generate_plan_batch(data: BatchStudyRequest, client_id: str = Depends(get_client_id)):
+    """
+    Generate plans for many requests in one call. Identical subject sets are
+    generated once; results are streamed as NDJSON lines in completion order,
+    each tagged with the index of the request it answers.
+
+    Up to PLANNER_MAX_BATCH_SIZE requests are accepted, but every distinct
+    plan is still paid from the caller's LLM token budget. Each item is
+    charged when it is dispatched and waits up to PLANNER_BATCH_BUDGET_WAIT
+    seconds for the bucket to refill; items that still don't fit come back
+    as lines with status_code 429 and retry_after, to be resubmitted later.
+    """
+    if not os.getenv("GROQ_API_KEY"):
+        raise HTTPException(status_code=500, detail="GROQ_API_KEY not found")
+
+    # Group request indexes by subject set (order and case insensitive)
+    groups = {}
+    for index, item in enumerate(data.requests):
+        subjects = [s.strip() for s in item.subjects if s.strip()]
+        key = tuple(sorted(s.lower() for s in subjects))
+        if key not in groups:
+            groups[key] = {"subjects": subjects, "indexes": []}
+        groups[key]["indexes"].append(index)
+
+    distinct = list(groups.values())
+    for group in distinct:
+        group["params"] = _build_params(group["subjects"])
+        group["cost"] = _estimate_cost(group["params"])
+
+    # Only distinct plans reach the LLM, so only those are charged. The first
+    # is charged now so an exhausted client gets a fast 429; the rest are
+    # charged one by one as workers pick them up.
+    llm_limiter.check(client_id, distinct[0]["cost"])
+    distinct[0]["charged"] = True
+
+    def run_item(group: dict) -> str:
+        if not group.get("charged"):
+            llm_limiter.wait(client_id, group["cost"], BATCH_BUDGET_WAIT)
+            group["charged"] = True
+        return _generate(group["params"], BATCH_SLOT_TIMEOUT)
+
+    def stream_results():
+        executor = ThreadPoolExecutor(max_workers=min(BATCH_CONCURRENCY, len(distinct)))
+        futures = {}
+        try:
+            futures = {executor.submit(run_item, group): group for group in distinct}
+            for future in as_completed(futures):
+                group = futures[future]
+                try:
+                    result = {"plan": future.result()}
+                except HTTPException as e:
+                    result = {"error": e.detail, "status_code": e.status_code}
+                    if e.headers and "Retry-After" in e.headers:
+                        result["retry_after"] = int(e.headers["Retry-After"])
+                    if e.status_code == 503 and group.get("charged"):
+                        # Shed before reaching upstream, so don't keep the charge
+                        llm_limiter.refund(client_id, group["cost"])
+                except Exception as e:
+                    result = {"error": str(e), "status_code": 500}
+
+                for index in group["indexes"]:
+                    line = {"index": index, "subjects": data.requests[index].subjects, **result}
+                    yield json.dumps(line) + "\n"
+        finally:
+            # Stop queued work if the client disconnects mid-stream
+            executor.shutdown(wait=False, cancel_futures=True)
+            for future, group in futures.items():
+                if future.cancelled() and group.get("charged"):
+                    llm_limiter.refund(client_id, group["cost"])
+
+    return StreamingResponse(
+        stream_results(),
+        media_type="application/x-ndjson",
+        headers={
+            "X-Batch-Size": str(len(data.requests)),
+            "X-Batch-Distinct": str(len(distinct))
+        }
+    )
+
+
+@router.get("/health")
+def health_check():
+    """
+    Check if planner API is working
+    """
+    return {
+        "status": "healthy",
+        "groq_api_configured": bool(os.getenv("GROQ_API_KEY")),
+        "llm_gate": llm_gate.stats(),
+        "single_flight": llm_calls.stats()
+    }
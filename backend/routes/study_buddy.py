@@ -33,6 +33,9 @@ class BuddyInfo(BaseModel):
     online: bool
     matchScore: int
 
+class BuddyListResponse(BaseModel):
+    buddies: List[BuddyInfo]
+
 class PendingRequest(BaseModel):
     id: str
     fromUserId: str
@@ -61,7 +64,7 @@ async def verify_token(authorization: str = Header(...)):
         raise HTTPException(status_code=401, detail=f"Invalid token: {str(e)}")
 
 # Get all available study buddies (excluding current user)
-@router.get("/available")
+@router.get("/available", response_model=BuddyListResponse)
 async def get_available_buddies(current_user: dict = Depends(verify_token)):
     try:
         current_user_id = current_user['uid']
@@ -76,23 +79,24 @@ async def get_available_buddies(current_user: dict = Depends(verify_token)):
             user_data = user.to_dict()
             if user.id != current_user_id:  # Exclude current user
                 study_prefs = user_data.get('studyPreferences', {})
-                buddy_info = {
-                    'id': user.id,
-                    'name': user_data.get('name', user_data.get('email', '').split('@')[0]),
-                    'email': user_data.get('email', ''),
-                    'subject': study_prefs.get('subject', 'General'),
-                    'level': study_prefs.get('level', 'Intermediate'),
-                    'availability': study_prefs.get('availability', 'Weekdays'),
-                    'studyStyle': study_prefs.get('studyStyle', 'Collaborative'),
-                    'online': user_data.get('online', False),
-                    'matchScore': random.randint(75, 98)  # Simulated match score
-                }
+                buddy_info = BuddyInfo(
+                    id=user.id,
+                    name=user_data.get('name', user_data.get('email', '').split('@')[0]),
+                    email=user_data.get('email', ''),
+                    subject=study_prefs.get('subject', 'General'),
+                    level=study_prefs.get('level', 'Intermediate'),
+                    availability=study_prefs.get('availability', 'Weekdays'),
+                    studyStyle=study_prefs.get('studyStyle', 'Collaborative'),
+                    online=user_data.get('online', False),
+                    matchScore=random.randint(75, 98)  # Simulated match score
+                )
                 available_buddies.append(buddy_info)
         
         # Sort by match score
-        available_buddies.sort(key=lambda x: x['matchScore'], reverse=True)
+        available_buddies.sort(key=lambda x: x.matchScore, reverse=True)
         
-        return {"buddies": available_buddies}
+        # Validated once here; the response model doesn't re-check instances
+        return BuddyListResponse(buddies=available_buddies)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,11 +1,14 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 import os
 from groq import Groq
 import json
 from datetime import datetime
 import tempfile
+import time
+from services.audio_preprocess import FFMPEG, prepare_for_transcription, preprocessing_report
+from services.rate_limit import audio_limiter, estimate_audio_seconds, get_client_id, llm_gate
 
 router = APIRouter(prefix="/api/voice", tags=["Voice Notes"])
 
@@ -26,6 +29,16 @@ except Exception as e:
 # In-memory storage (replace with database in production)
 voice_notes_storage = []
 
+class PreprocessingReport(BaseModel):
+    applied: bool
+    original_bytes: int
+    processed_bytes: int
+    bytes_saved: int
+    original_seconds: Optional[float] = None
+    processed_seconds: Optional[float] = None
+    transcription_seconds: float
+    transcription_seconds_saved_estimate: float
+
 class VoiceNote(BaseModel):
     id: str
     title: str
@@ -33,9 +46,16 @@ class VoiceNote(BaseModel):
     summary: str
     key_points: List[str]
     created_at: str
+    preprocessing: Optional[PreprocessingReport] = None
+
+class VoiceNotesResponse(BaseModel):
+    notes: List[VoiceNote]
 
-@router.post("/transcribe")
-async def transcribe_audio(audio: UploadFile = File(...)):
+@router.post("/transcribe", response_model=VoiceNote)
+async def transcribe_audio(
+    audio: UploadFile = File(...),
+    client_id: str = Depends(get_client_id)
+):
     """
     Transcribe audio file using Groq Whisper API
     """
@@ -71,34 +91,60 @@ async def transcribe_audio(audio: UploadFile = File(...)):
                 file_extension = ".ogg"
             elif "wav" in audio.content_type:
                 file_extension = ".wav"
+
+        # Charge estimated audio length before any upstream work
+        audio_cost = estimate_audio_seconds(len(audio_content), file_extension)
+        audio_limiter.check(client_id, audio_cost)
+
+        # Take the gate slot before preprocessing so overload is shed before
+        # ffmpeg runs; a shed request never used its audio budget
+        try:
+            llm_gate.acquire()
+        except HTTPException:
+            audio_limiter.refund(client_id, audio_cost)
+            raise
+
+        try:
+            # Trim silence and downsample to 16 kHz mono before upload
+            preprocessed = await prepare_for_transcription(audio_content, file_extension)
+            if preprocessed["applied"]:
+                audio_content = preprocessed["audio"]
+                file_extension = preprocessed["file_extension"]
+                print(f"🎚️ Preprocessed audio: {preprocessed['original_bytes']} -> {preprocessed['processed_bytes']} bytes")
         
-        with tempfile.NamedTemporaryFile(delete=False, suffix=file_extension) as temp_file:
-            temp_file.write(audio_content)
-            temp_path = temp_file.name
+            with tempfile.NamedTemporaryFile(delete=False, suffix=file_extension) as temp_file:
+                temp_file.write(audio_content)
+                temp_path = temp_file.name
         
-        print(f"💾 Saved to temp file: {temp_path}")
+            print(f"💾 Saved to temp file: {temp_path}")
 
-        # Transcribe using Groq Whisper
-        print("🎤 Starting transcription with Groq Whisper...")
-        try:
-            with open(temp_path, "rb") as audio_file:
-                transcription = client.audio.transcriptions.create(
-                    file=(audio.filename or f"recording{file_extension}", audio_file.read()),
-                    model="whisper-large-v3",
-                    response_format="json",
-                    language="en"
-                )
+            # Transcribe using Groq Whisper
+            print("🎤 Starting transcription with Groq Whisper...")
+            try:
+                # Re-encoded audio no longer matches the uploaded filename's extension
+                upload_name = f"recording{file_extension}" if preprocessed["applied"] else (audio.filename or f"recording{file_extension}")
+                transcribe_start = time.perf_counter()
+                with open(temp_path, "rb") as audio_file:
+                    transcription = client.audio.transcriptions.create(
+                        file=(upload_name, audio_file.read()),
+                        model="whisper-large-v3",
+                        response_format="json",
+                        language="en"
+                    )
 
-            transcript = transcription.text
-            print(f"✅ Transcription complete: {len(transcript)} characters")
-            print(f"📝 Transcript preview: {transcript[:100]}...")
+                transcription_seconds = time.perf_counter() - transcribe_start
+                transcript = transcription.text
+                print(f"✅ Transcription complete: {len(transcript)} characters")
+                print(f"📝 Transcript preview: {transcript[:100]}...")
 
-        except Exception as e:
-            print(f"❌ Transcription failed: {str(e)}")
-            raise HTTPException(
-                status_code=500,
-                detail=f"Transcription failed: {str(e)}. Check your GROQ_API_KEY and audio format."
-            )
+            except Exception as e:
+                print(f"❌ Transcription failed: {str(e)}")
+                raise HTTPException(
+                    status_code=500,
+                    detail=f"Transcription failed: {str(e)}. Check your GROQ_API_KEY and audio format."
+                )
+        finally:
+            llm_gate.release()
 
         if not transcript or len(transcript.strip()) == 0:
             raise HTTPException(
@@ -109,16 +155,18 @@ async def transcribe_audio(audio: UploadFile = File(...)):
         # Generate summary and key points using LLM
         print("🤖 Generating summary and key points...")
         try:
-            completion = client.chat.completions.create(
-                model="llama-3.3-70b-versatile",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a helpful study assistant. Extract key points and create a concise summary. Always respond in valid JSON format."
-                    },
-                    {
-                        "role": "user",
-                        "content": f"""Analyze this lecture/study note transcript and provide:
+            # If the gate is full we shed the summary and fall back below
+            with llm_gate.slot():
+                completion = client.chat.completions.create(
+                    model="llama-3.3-70b-versatile",
+                    messages=[
+                        {
+                            "role": "system",
+                            "content": "You are a helpful study assistant. Extract key points and create a concise summary. Always respond in valid JSON format."
+                        },
+                        {
+                            "role": "user",
+                            "content": f"""Analyze this lecture/study note transcript and provide:
 1. A brief summary (2-3 sentences)
 2. 5-7 key points (bullet points)
 
@@ -129,11 +177,11 @@ Respond ONLY in this JSON format (no markdown, no code blocks):
   "summary": "...",
   "key_points": ["point1", "point2", "point3", "point4", "point5"]
 }}"""
-                    }
-                ],
-                temperature=0.5,
-                max_tokens=500
-            )
+                        }
+                    ],
+                    temperature=0.5,
+                    max_tokens=500
+                )
 
             # Parse AI response
             ai_response = completion.choices[0].message.content
@@ -185,16 +233,17 @@ Respond ONLY in this JSON format (no markdown, no code blocks):
 
         # Create voice note entry
         note_id = f"note_{int(datetime.now().timestamp() * 1000)}"
-        voice_note = {
-            "id": note_id,
-            "title": f"Voice Note - {datetime.now().strftime('%b %d, %Y %I:%M %p')}",
-            "transcript": transcript,
-            "summary": summary,
-            "key_points": key_points,
-            "created_at": datetime.now().isoformat()
-        }
-
-        # Store in memory
+        voice_note = VoiceNote(
+            id=note_id,
+            title=f"Voice Note - {datetime.now().strftime('%b %d, %Y %I:%M %p')}",
+            transcript=transcript,
+            summary=str(summary),
+            key_points=[str(point) for point in key_points] if isinstance(key_points, list) else [str(key_points)],
+            created_at=datetime.now().isoformat(),
+            preprocessing=preprocessing_report(preprocessed, transcription_seconds)
+        )
+
+        # Store validated models in memory so listing doesn't re-validate
         voice_notes_storage.append(voice_note)
         
         print(f"✅ Voice note saved: {note_id}")
@@ -220,12 +269,12 @@ Respond ONLY in this JSON format (no markdown, no code blocks):
         )
 
 
-@router.get("/notes")
+@router.get("/notes", response_model=VoiceNotesResponse)
 def get_all_notes():
     """
     Get all saved voice notes
     """
-    return {"notes": voice_notes_storage}
+    return VoiceNotesResponse(notes=voice_notes_storage)
 
 
 @router.delete("/notes/{note_id}")
@@ -235,7 +284,7 @@ def delete_note(note_id: str):
     """
     global voice_notes_storage
     initial_length = len(voice_notes_storage)
-    voice_notes_storage = [note for note in voice_notes_storage if note["id"] != note_id]
+    voice_notes_storage = [note for note in voice_notes_storage if note.id != note_id]
     
     if len(voice_notes_storage) == initial_length:
         raise HTTPException(status_code=404, detail="Note not found")
@@ -253,5 +302,7 @@ def health_check():
         "status": "healthy",
         "groq_api_configured": bool(os.getenv("GROQ_API_KEY")),
         "groq_client_initialized": client is not None,
+        "llm_gate": llm_gate.stats(),
+        "audio_preprocessing": FFMPEG is not None,
         "notes_count": len(voice_notes_storage)
     }
\ No newline at end of file
@@ -0,0 +1,147 @@
+import asyncio
+import os
+import re
+import shutil
+from typing import Optional, Tuple
+
+# ffmpeg is a system dependency; without it uploads are forwarded unchanged
+FFMPEG = shutil.which("ffmpeg")
+
+SAMPLE_RATE = 16000
+PREPROCESS_WORKERS = int(os.getenv("AUDIO_PREPROCESS_WORKERS", "2"))
+PREPROCESS_TIMEOUT = int(os.getenv("AUDIO_PREPROCESS_TIMEOUT", "60"))
+
+# Shorten any pause longer than 0.7s below -45 dB and drop leading silence.
+# stop_silence keeps 0.2s of each pause so sentences aren't spliced together,
+# which would hurt Whisper's segmentation.
+SILENCE_FILTER = (
+    "silenceremove=start_periods=1:start_threshold=-45dB:"
+    "stop_periods=-1:stop_duration=0.7:stop_threshold=-45dB:stop_silence=0.2"
+)
+
+# The work happens in ffmpeg child processes; this only caps how many run at once
+_workers = asyncio.Semaphore(PREPROCESS_WORKERS)
+
+
+async def _ffmpeg(args: list, data: bytes) -> Tuple[bytes, str]:
+    process = await asyncio.create_subprocess_exec(
+        FFMPEG, "-hide_banner", "-nostats", *args,
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(data), timeout=PREPROCESS_TIMEOUT)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        raise RuntimeError(f"ffmpeg timed out after {PREPROCESS_TIMEOUT}s")
+
+    log = stderr.decode(errors="replace")
+    if process.returncode != 0:
+        raise RuntimeError(f"ffmpeg exited with {process.returncode}: {log.strip()[-500:]}")
+    return stdout, log
+
+
+def parse_durations(log: str) -> Tuple[float, float]:
+    """
+    Read (original_seconds, processed_seconds) from ffmpeg's log: volumedetect
+    counts the 16 kHz samples before trimming, -progress reports output time
+    """
+    samples = re.findall(r"n_samples: (\d+)", log)
+    out_times = re.findall(r"out_time_us=(\d+)", log)
+    if not samples:
+        raise RuntimeError("ffmpeg did not report the input sample count")
+    original_seconds = int(samples[-1]) / SAMPLE_RATE
+    processed_seconds = int(out_times[-1]) / 1_000_000 if out_times else 0.0
+    return original_seconds, processed_seconds
+
+
+async def preprocess_audio(audio_content: bytes) -> dict:
+    """
+    Decode, trim silence, downmix to 16 kHz mono and re-encode as Opus/Ogg
+    in a single ffmpeg pass. Returns the processed bytes plus stats.
+    """
+    # Raw PCM never leaves ffmpeg; volumedetect only counts samples on the way through
+    audio_filter = f"aresample={SAMPLE_RATE},aformat=channel_layouts=mono,volumedetect,{SILENCE_FILTER}"
+    encoded, log = await _ffmpeg(
+        ["-loglevel", "info", "-progress", "pipe:2", "-i", "pipe:0", "-vn", "-af", audio_filter,
+         "-ac", "1", "-ar", str(SAMPLE_RATE), "-c:a", "libopus", "-b:a", "24k", "-application", "voip",
+         "-f", "ogg", "pipe:1"],
+        audio_content
+    )
+    original_seconds, processed_seconds = parse_durations(log)
+
+    return {
+        "audio": encoded,
+        "original_seconds": original_seconds,
+        "processed_seconds": processed_seconds
+    }
+
+
+async def prepare_for_transcription(audio_content: bytes, file_extension: str) -> dict:
+    """
+    Preprocess an upload in ffmpeg subprocesses without blocking the event
+    loop. Falls back to the original bytes when ffmpeg is missing, fails,
+    or would not make the file smaller.
+    """
+    stats = {
+        "audio": audio_content,
+        "file_extension": file_extension,
+        "applied": False,
+        "original_bytes": len(audio_content),
+        "processed_bytes": len(audio_content),
+        "original_seconds": None,
+        "processed_seconds": None
+    }
+
+    if not FFMPEG:
+        return stats
+
+    try:
+        async with _workers:
+            result = await preprocess_audio(audio_content)
+    except Exception as e:
+        print(f"⚠️ Audio preprocessing failed, sending original: {e}")
+        return stats
+
+    stats["original_seconds"] = result["original_seconds"]
+    stats["processed_seconds"] = result["processed_seconds"]
+
+    if result["processed_seconds"] == 0:
+        # Nothing but silence; let Whisper see the original and report it
+        return stats
+
+    if len(result["audio"]) < len(audio_content):
+        stats["audio"] = result["audio"]
+        stats["file_extension"] = ".ogg"
+        stats["applied"] = True
+        stats["processed_bytes"] = len(result["audio"])
+
+    return stats
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 2) if value is not None else None
+
+
+def preprocessing_report(stats: dict, transcription_seconds: float) -> dict:
+    """
+    Per-note summary of what preprocessing saved. Transcription time saved
+    is estimated by scaling the measured time by the audio length removed.
+    """
+    time_saved = 0.0
+    if stats["applied"] and stats["processed_seconds"]:
+        ratio = stats["original_seconds"] / stats["processed_seconds"]
+        time_saved = transcription_seconds * (ratio - 1)
+
+    return {
+        "applied": stats["applied"],
+        "original_bytes": stats["original_bytes"],
+        "processed_bytes": stats["processed_bytes"],
+        "bytes_saved": stats["original_bytes"] - stats["processed_bytes"],
+        "original_seconds": _round(stats["original_seconds"]),
+        "processed_seconds": _round(stats["processed_seconds"]),
+        "transcription_seconds": round(transcription_seconds, 3),
+        "transcription_seconds_saved_estimate": round(time_saved, 3)
+    }
@@ -0,0 +1,225 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from fastapi import Header, HTTPException, Request
+from firebase_admin import auth as firebase_auth
+
+# Budgets are configurable per deployment (Render dashboard / .env)
+LLM_TOKENS_PER_MINUTE = float(os.getenv("RATE_LIMIT_LLM_TOKENS_PER_MINUTE", "6000"))
+LLM_TOKENS_BURST = float(os.getenv("RATE_LIMIT_LLM_TOKENS_BURST", "3000"))
+AUDIO_SECONDS_PER_HOUR = float(os.getenv("RATE_LIMIT_AUDIO_SECONDS_PER_HOUR", "1800"))
+AUDIO_SECONDS_BURST = float(os.getenv("RATE_LIMIT_AUDIO_SECONDS_BURST", "600"))
+MAX_CONCURRENT_LLM_CALLS = int(os.getenv("MAX_CONCURRENT_LLM_CALLS", "8"))
+# Number of proxies in front of us that append to X-Forwarded-For (Render adds one).
+# Set to 0 when the app is reached directly so the header is ignored.
+TRUSTED_PROXY_HOPS = int(os.getenv("TRUSTED_PROXY_HOPS", "1"))
+
+# Rough compressed byte rates for browser recordings, used to estimate
+# audio length before decoding. Lower rates over-estimate duration, which
+# is the safe direction for a limiter.
+AUDIO_BYTES_PER_SECOND = {
+    ".webm": 4000,   # opus ~32 kbps
+    ".ogg": 4000,    # opus ~32 kbps
+    ".mp4": 8000,    # aac ~64 kbps
+    ".wav": 32000,   # 16 kHz 16-bit mono
+}
+
+
+def estimate_prompt_tokens(text: str, max_tokens: int = 0) -> int:
+    """
+    Estimate the token cost of an LLM call (~4 characters per token)
+    """
+    return max(1, len(text) // 4) + max_tokens
+
+
+def estimate_audio_seconds(num_bytes: int, file_extension: str) -> float:
+    """
+    Estimate audio duration from upload size and container type
+    """
+    bytes_per_second = AUDIO_BYTES_PER_SECOND.get(file_extension, 4000)
+    return max(1.0, num_bytes / bytes_per_second)
+
+
+class TokenBucket:
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def try_consume(self, cost: float, now: float) -> float:
+        """
+        Take `cost` tokens if available. Returns 0 on success, otherwise
+        the number of seconds until enough tokens will have refilled.
+        """
+        elapsed = max(0.0, now - self.updated)
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.refill_per_second)
+        self.updated = now
+
+        if cost <= self.tokens:
+            self.tokens -= cost
+            return 0.0
+
+        # Requests larger than the bucket are charged against a full bucket
+        missing = min(cost, self.capacity) - self.tokens
+        if missing <= 0:
+            self.tokens -= cost
+            return 0.0
+        return missing / self.refill_per_second
+
+
+class RateLimiter:
+    """
+    Cost-weighted token bucket per client key (Firebase uid or IP)
+    """
+
+    def __init__(self, name: str, capacity: float, refill_per_second: float, max_keys: int = 10000):
+        self.name = name
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.max_keys = max_keys
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def check(self, key: str, cost: float) -> None:
+        """
+        Charge `cost` to `key` or raise 429 with a Retry-After header
+        """
+        wait = self._try_consume(key, cost)
+        if wait > 0:
+            raise self._too_many(wait)
+
+    def wait(self, key: str, cost: float, max_wait: float) -> None:
+        """
+        Charge `cost` to `key`, sleeping for the bucket to refill for up to
+        `max_wait` seconds. Raises 429 if the budget can't cover it in time.
+        """
+        deadline = time.monotonic() + max_wait
+        while True:
+            wait = self._try_consume(key, cost)
+            if wait <= 0:
+                return
+            if time.monotonic() + wait > deadline:
+                raise self._too_many(wait)
+            time.sleep(wait)
+
+    def _try_consume(self, key: str, cost: float) -> float:
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= self.max_keys:
+                    self._evict_full_buckets(now)
+                bucket = TokenBucket(self.capacity, self.refill_per_second)
+                self._buckets[key] = bucket
+            return bucket.try_consume(cost, now)
+
+    def _too_many(self, wait: float) -> HTTPException:
+        retry_after = max(1, int(wait + 0.999))
+        return HTTPException(
+            status_code=429,
+            detail=f"Rate limit exceeded for {self.name}. Retry in {retry_after}s.",
+            headers={"Retry-After": str(retry_after)}
+        )
+
+    def refund(self, key: str, cost: float) -> None:
+        """
+        Give back tokens charged for work that never reached upstream
+        """
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.tokens = min(bucket.capacity, bucket.tokens + cost)
+
+    def _evict_full_buckets(self, now: float) -> None:
+        # Buckets that have refilled completely carry no state worth keeping
+        idle_after = self.capacity / self.refill_per_second
+        stale = [k for k, b in self._buckets.items() if now - b.updated >= idle_after]
+        for k in stale:
+            del self._buckets[k]
+        if len(self._buckets) >= self.max_keys:
+            oldest = min(self._buckets, key=lambda k: self._buckets[k].updated)
+            del self._buckets[oldest]
+
+
+class ConcurrencyGate:
+    """
+    Global cap on in-flight upstream calls. When every slot is taken the
+    request is shed immediately with 503 instead of queueing, unless the
+    caller opts into waiting up to `timeout` seconds for a slot.
+    """
+
+    def __init__(self, limit: int, retry_after: int = 2):
+        self.limit = limit
+        self.retry_after = retry_after
+        self._semaphore = threading.BoundedSemaphore(limit)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.shed_count = 0
+
+    def acquire(self, timeout: Optional[float] = None) -> None:
+        """
+        Take a slot or raise 503. Pair every successful call with release().
+        """
+        if timeout is None:
+            acquired = self._semaphore.acquire(blocking=False)
+        else:
+            acquired = self._semaphore.acquire(timeout=timeout)
+        if not acquired:
+            with self._lock:
+                self.shed_count += 1
+            raise HTTPException(
+                status_code=503,
+                detail="Server is busy. Please retry shortly.",
+                headers={"Retry-After": str(self.retry_after)}
+            )
+        with self._lock:
+            self.in_flight += 1
+
+    def release(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+        self._semaphore.release()
+
+    @contextmanager
+    def slot(self, timeout: Optional[float] = None):
+        self.acquire(timeout)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "shed": self.shed_count
+        }
+
+
+# Shared limiters
+llm_limiter = RateLimiter("LLM tokens", LLM_TOKENS_BURST, LLM_TOKENS_PER_MINUTE / 60)
+audio_limiter = RateLimiter("audio seconds", AUDIO_SECONDS_BURST, AUDIO_SECONDS_PER_HOUR / 3600)
+llm_gate = ConcurrencyGate(MAX_CONCURRENT_LLM_CALLS)
+
+
+# Dependency to identify the caller: Firebase uid when a valid token is sent, else client IP
+def get_client_id(request: Request, authorization: Optional[str] = Header(None)) -> str:
+    if authorization and authorization.startswith("Bearer "):
+        try:
+            decoded_token = firebase_auth.verify_id_token(authorization.replace("Bearer ", ""))
+            return f"uid:{decoded_token['uid']}"
+        except Exception:
+            pass
+
+    # Clients can put anything at the front of X-Forwarded-For; only the entry
+    # appended by our outermost trusted proxy identifies the real peer
+    forwarded_for = request.headers.get("x-forwarded-for")
+    if forwarded_for and TRUSTED_PROXY_HOPS > 0:
+        hops = [hop.strip() for hop in forwarded_for.split(",") if hop.strip()]
+        if len(hops) >= TRUSTED_PROXY_HOPS:
+            return f"ip:{hops[-TRUSTED_PROXY_HOPS]}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
@@ -0,0 +1,21 @@
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+# orjson is much faster than the stdlib encoder; fall back if it isn't installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class CompactJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson when available. Output is compact
+    (no whitespace) either way.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
@@ -0,0 +1,84 @@
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import Future, TimeoutError
+from typing import Any, Callable, Dict
+
+from fastapi import HTTPException
+
+# Groq's client times out each attempt after 60s; waiters give up a bit later so
+# a stuck leader (or one still retrying) can't pin worker threads forever
+WAIT_TIMEOUT = float(os.getenv("SINGLE_FLIGHT_WAIT_TIMEOUT", "75"))
+
+
+def request_key(params: dict) -> str:
+    """
+    Stable key for an upstream call: same model, messages and parameters
+    produce the same key
+    """
+    encoded = json.dumps(params, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class SingleFlight:
+    """
+    Coalesces identical in-flight calls. The first caller for a key runs
+    the upstream call; callers arriving while it is running wait for and
+    share its result (or its exception).
+    """
+
+    def __init__(self, wait_timeout: float = WAIT_TIMEOUT):
+        self.wait_timeout = wait_timeout
+        self._calls: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.upstream_calls = 0
+        self.coalesced_calls = 0
+        self.timed_out_waits = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.coalesced_calls += 1
+                leader = False
+            else:
+                future = Future()
+                self._calls[key] = future
+                self.upstream_calls += 1
+                leader = True
+
+        if not leader:
+            try:
+                return future.result(timeout=self.wait_timeout)
+            except TimeoutError:
+                with self._lock:
+                    self.timed_out_waits += 1
+                raise HTTPException(
+                    status_code=504,
+                    detail="Timed out waiting for an identical in-flight request."
+                )
+
+        try:
+            result = fn()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "upstream_calls": self.upstream_calls,
+                "coalesced_calls": self.coalesced_calls,
+                "timed_out_waits": self.timed_out_waits,
+                "in_flight": len(self._calls)
+            }
+
+
+# Shared across routes so identical prompts coalesce regardless of endpoint
+llm_calls = SingleFlight()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Routes and services are imported as top-level packages from backend/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
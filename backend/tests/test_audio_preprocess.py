@@ -0,0 +1,94 @@
+import asyncio
+import shutil
+
+from services import audio_preprocess
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_without_ffmpeg_original_audio_is_kept(monkeypatch):
+    monkeypatch.setattr(audio_preprocess, "FFMPEG", None)
+
+    stats = run(audio_preprocess.prepare_for_transcription(b"audio", ".webm"))
+
+    assert stats["applied"] is False
+    assert stats["audio"] == b"audio"
+
+
+def test_failing_ffmpeg_falls_back_to_original(monkeypatch):
+    monkeypatch.setattr(audio_preprocess, "FFMPEG", shutil.which("false"))
+
+    stats = run(audio_preprocess.prepare_for_transcription(b"audio", ".webm"))
+
+    assert stats["applied"] is False
+    assert stats["file_extension"] == ".webm"
+    assert audio_preprocess.preprocessing_report(stats, 1.0)["bytes_saved"] == 0
+
+
+FFMPEG_LOG = """Input #0, matroska,webm, from 'pipe:0':
+  Duration: N/A, start: 0.000000, bitrate: N/A
+[Parsed_volumedetect_2 @ 0x55d0c8a0] n_samples: 160000
+[Parsed_volumedetect_2 @ 0x55d0c8a0] mean_volume: -27.4 dB
+out_time_us=2500000
+progress=continue
+out_time_us=5000000
+progress=end
+"""
+
+
+def stub_ffmpeg(monkeypatch, output: bytes, log: str):
+    calls = []
+
+    async def fake_ffmpeg(args, data):
+        calls.append(args)
+        return output, log
+
+    monkeypatch.setattr(audio_preprocess, "FFMPEG", "ffmpeg")
+    monkeypatch.setattr(audio_preprocess, "_ffmpeg", fake_ffmpeg)
+    return calls
+
+
+def test_parse_durations_reads_samples_and_final_output_time():
+    assert audio_preprocess.parse_durations(FFMPEG_LOG) == (10.0, 5.0)
+
+
+def test_trimmed_audio_is_used_and_reported(monkeypatch):
+    calls = stub_ffmpeg(monkeypatch, b"o" * 400, FFMPEG_LOG)
+
+    stats = run(audio_preprocess.prepare_for_transcription(b"a" * 1000, ".webm"))
+    report = audio_preprocess.preprocessing_report(stats, transcription_seconds=2.0)
+
+    assert len(calls) == 1
+    assert stats["applied"] is True
+    assert stats["file_extension"] == ".ogg"
+    assert stats["audio"] == b"o" * 400
+    assert report["bytes_saved"] == 600
+    assert report["original_seconds"] == 10.0
+    assert report["processed_seconds"] == 5.0
+    # Half the audio was removed, so Whisper would have taken twice as long
+    assert report["transcription_seconds_saved_estimate"] == 2.0
+
+
+def test_all_silence_keeps_original(monkeypatch):
+    stub_ffmpeg(monkeypatch, b"", "[Parsed_volumedetect_2 @ 0x1] n_samples: 48000\nprogress=end\n")
+
+    stats = run(audio_preprocess.prepare_for_transcription(b"a" * 1000, ".webm"))
+    report = audio_preprocess.preprocessing_report(stats, transcription_seconds=2.0)
+
+    assert stats["applied"] is False
+    assert stats["processed_seconds"] == 0
+    assert report["original_seconds"] == 3.0
+    assert report["bytes_saved"] == 0
+    assert report["transcription_seconds_saved_estimate"] == 0.0
+
+
+def test_larger_output_keeps_original(monkeypatch):
+    stub_ffmpeg(monkeypatch, b"o" * 2000, FFMPEG_LOG)
+
+    stats = run(audio_preprocess.prepare_for_transcription(b"a" * 1000, ".wav"))
+
+    assert stats["applied"] is False
+    assert stats["file_extension"] == ".wav"
+    assert audio_preprocess.preprocessing_report(stats, 2.0)["transcription_seconds_saved_estimate"] == 0.0
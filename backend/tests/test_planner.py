@@ -0,0 +1,115 @@
+import json
+import os
+from unittest import mock
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+os.environ.setdefault("GROQ_API_KEY", "test-key")
+
+import routes.planner as planner
+from services.rate_limit import ConcurrencyGate, RateLimiter
+
+
+def fake_completion(**params):
+    return mock.Mock(choices=[mock.Mock(message=mock.Mock(content="plan"))])
+
+
+@pytest.fixture
+def client(monkeypatch):
+    limiter = RateLimiter("LLM tokens", capacity=3000, refill_per_second=0.001)
+    monkeypatch.setattr(planner, "llm_limiter", limiter)
+    groq_client = mock.Mock()
+    groq_client.chat.completions.create = fake_completion
+    monkeypatch.setattr(planner, "client", groq_client)
+    app = FastAPI()
+    app.include_router(planner.router)
+    return TestClient(app), limiter
+
+
+def bucket_tokens(limiter: RateLimiter) -> float:
+    (bucket,) = limiter._buckets.values()
+    return bucket.tokens
+
+
+def batch_of(count: int) -> dict:
+    return {"requests": [{"subjects": [f"Subject {i}"]} for i in range(count)]}
+
+
+def test_cohort_batch_waits_for_budget_instead_of_failing(client, monkeypatch):
+    test_client, limiter = client
+    monkeypatch.setattr(limiter, "refill_per_second", 1_000_000)
+    monkeypatch.setattr(limiter, "capacity", 3000)
+
+    response = test_client.post("/api/planner/generate/batch", json=batch_of(40))
+    lines = [json.loads(line) for line in response.text.splitlines()]
+
+    assert response.status_code == 200
+    assert len(lines) == 40
+    assert all(line.get("plan") == "plan" for line in lines)
+
+
+def test_items_beyond_budget_stream_429_with_retry_after(client, monkeypatch):
+    test_client, limiter = client
+    monkeypatch.setattr(planner, "BATCH_BUDGET_WAIT", 0.01)
+    affordable = int(3000 // planner._estimate_cost(planner._build_params(["Subject 0"])))
+
+    response = test_client.post("/api/planner/generate/batch", json=batch_of(affordable + 3))
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    limited = [line for line in lines if line.get("status_code") == 429]
+
+    assert response.status_code == 200
+    assert sum("plan" in line for line in lines) == affordable
+    assert len(limited) == 3
+    assert all(line["retry_after"] >= 1 for line in limited)
+
+
+def test_exhausted_client_gets_fast_429(client):
+    test_client, limiter = client
+    limiter.check("ip:203.0.113.7", 3000)
+
+    response = test_client.post(
+        "/api/planner/generate/batch",
+        json=batch_of(2),
+        headers={"X-Forwarded-For": "203.0.113.7"}
+    )
+
+    assert response.status_code == 429
+    assert "Retry-After" in response.headers
+
+
+def test_duplicate_subject_sets_are_generated_once(client):
+    test_client, limiter = client
+    body = {"requests": [{"subjects": ["Math", "Art"]}, {"subjects": ["art", "math"]}]}
+
+    response = test_client.post("/api/planner/generate/batch", json=body)
+    lines = [json.loads(line) for line in response.text.splitlines()]
+
+    assert response.headers["X-Batch-Distinct"] == "1"
+    assert sorted(line["index"] for line in lines) == [0, 1]
+    assert all(line["plan"] == "plan" for line in lines)
+
+
+def test_shed_batch_items_are_refunded(client, monkeypatch):
+    test_client, limiter = client
+    monkeypatch.setattr(planner, "llm_gate", ConcurrencyGate(1))
+    monkeypatch.setattr(planner, "BATCH_SLOT_TIMEOUT", 0.01)
+
+    with planner.llm_gate.slot():
+        response = test_client.post("/api/planner/generate/batch", json={"requests": [{"subjects": ["Math"]}]})
+
+    assert json.loads(response.text)["status_code"] == 503
+    assert bucket_tokens(limiter) == pytest.approx(3000, abs=1)
+
+
+def test_shed_single_plan_is_refunded(client, monkeypatch):
+    test_client, limiter = client
+    monkeypatch.setattr(planner, "llm_gate", ConcurrencyGate(1))
+
+    with planner.llm_gate.slot():
+        codes = [test_client.post("/api/planner/generate", json={"subjects": ["Math"]}).status_code for _ in range(8)]
+
+    assert codes == [503] * 8
+    assert bucket_tokens(limiter) == pytest.approx(3000, abs=1)
+    assert test_client.post("/api/planner/generate", json={"subjects": ["Math"]}).status_code == 200
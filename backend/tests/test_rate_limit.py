@@ -0,0 +1,45 @@
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from services.rate_limit import RateLimiter, get_client_id
+
+
+def make_client(limiter: RateLimiter) -> TestClient:
+    app = FastAPI()
+
+    @app.post("/limited")
+    def limited(client_id: str = Depends(get_client_id)):
+        limiter.check(client_id, 1)
+        return {"client_id": client_id}
+
+    return TestClient(app)
+
+
+def test_spoofed_forwarded_for_does_not_reset_bucket():
+    client = make_client(RateLimiter("test", capacity=3, refill_per_second=0.001))
+
+    # The proxy appends the real peer; everything before it is client-controlled
+    codes = [
+        client.post("/limited", headers={"X-Forwarded-For": f"10.0.0.{i}, 203.0.113.7"}).status_code
+        for i in range(6)
+    ]
+
+    assert codes == [200, 200, 200, 429, 429, 429]
+
+
+def test_client_id_uses_proxy_appended_address():
+    client = make_client(RateLimiter("test", capacity=10, refill_per_second=1))
+
+    response = client.post("/limited", headers={"X-Forwarded-For": "1.2.3.4, 203.0.113.7"})
+
+    assert response.json() == {"client_id": "ip:203.0.113.7"}
+
+
+def test_over_budget_response_has_retry_after():
+    client = make_client(RateLimiter("test", capacity=1, refill_per_second=0.5))
+
+    client.post("/limited")
+    response = client.post("/limited")
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "2"
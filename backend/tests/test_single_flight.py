@@ -0,0 +1,47 @@
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from services.single_flight import SingleFlight, request_key
+
+
+def test_identical_calls_share_one_upstream_call():
+    flight = SingleFlight()
+    calls = []
+
+    def upstream():
+        calls.append(1)
+        time.sleep(0.2)
+        return "plan"
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(flight.do(request_key({"prompt": "x"}), upstream)))
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["plan"] * 5
+    assert len(calls) == 1
+    assert flight.stats()["coalesced_calls"] == 4
+
+
+def test_waiter_times_out_with_504():
+    flight = SingleFlight(wait_timeout=0.05)
+    release = threading.Event()
+    leader = threading.Thread(target=lambda: flight.do("key", release.wait))
+    leader.start()
+    time.sleep(0.02)
+
+    with pytest.raises(HTTPException) as excinfo:
+        flight.do("key", lambda: "unused")
+
+    release.set()
+    leader.join()
+    assert excinfo.value.status_code == 504
+    assert flight.stats()["timed_out_waits"] == 1
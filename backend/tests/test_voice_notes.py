@@ -0,0 +1,37 @@
+import os
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+os.environ.setdefault("GROQ_API_KEY", "test-key")
+
+import routes.voice_notes as voice_notes
+from services.rate_limit import ConcurrencyGate, RateLimiter
+
+
+def test_shed_transcription_skips_preprocessing_and_is_refunded(monkeypatch):
+    limiter = RateLimiter("audio seconds", capacity=600, refill_per_second=0.001)
+    gate = ConcurrencyGate(1)
+    preprocess_calls = []
+
+    async def fake_prepare(audio_content, file_extension):
+        preprocess_calls.append(file_extension)
+
+    monkeypatch.setattr(voice_notes, "audio_limiter", limiter)
+    monkeypatch.setattr(voice_notes, "llm_gate", gate)
+    monkeypatch.setattr(voice_notes, "prepare_for_transcription", fake_prepare)
+    app = FastAPI()
+    app.include_router(voice_notes.router)
+    client = TestClient(app)
+
+    with gate.slot():
+        response = client.post(
+            "/api/voice/transcribe",
+            files={"audio": ("note.webm", b"x" * 400_000, "audio/webm")}
+        )
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "2"
+    assert preprocess_calls == []
+    (bucket,) = limiter._buckets.values()
+    assert bucket.tokens == 600
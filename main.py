@@ -1,5 +1,6 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 import os
 from dotenv import load_dotenv
 import firebase_admin
@@ -34,11 +35,22 @@ if not firebase_admin._apps:
         print(f"⚠️  Firebase initialization failed: {e}")
         print("⚠️  Make sure FIREBASE_SERVICE_ACCOUNT env var is set or serviceAccountKey.json exists")
 
+# Fast JSON + compression live in services/ next to routes/; like the routes,
+# a failed import must not stop the app from starting
+try:
+    from services.compression import CompressionMiddleware
+    from services.serialization import CompactJSONResponse
+except Exception as e:
+    print(f"⚠️  Fast JSON/compression unavailable, using defaults: {e}")
+    CompressionMiddleware = None
+    CompactJSONResponse = JSONResponse
+
 # Create FastAPI app
 app = FastAPI(
     title="SmartStudy API",
     version="1.0.0",
-    description="AI-Powered Study Assistant Backend"
+    description="AI-Powered Study Assistant Backend",
+    default_response_class=CompactJSONResponse
 )
 
 # ✅ CORS Configuration - Allow your Vercel domain + localhost
@@ -69,6 +81,10 @@ app.add_middleware(
     expose_headers=["*"],
 )
 
+# ✅ gzip/brotli for large JSON payloads (voice notes, buddy lists)
+if CompressionMiddleware is not None:
+    app.add_middleware(CompressionMiddleware)
+
 # Import routes AFTER CORS is configured
 try:
     from routes.planner import router as planner_router
@@ -101,6 +117,7 @@ def read_root():
             "docs": "/docs",
             "voice_transcribe": "/api/voice/transcribe",
             "voice_health": "/api/voice/health",
+            "planner_health": "/api/planner/health",
         }
     }
 